@@ -1,7 +1,9 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
 import matplotlib
+# Streamlit renders figures server-side, so use the non-interactive backend
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
 
 # Font config for Chinese, keep for compatibility
 matplotlib.rcParams['font.sans-serif'] = [
@@ -9,10 +11,68 @@ matplotlib.rcParams['font.sans-serif'] = [
 ]
 matplotlib.rcParams['axes.unicode_minus'] = False
 
+# Fast-render settings for the ~1000-point line plots
+matplotlib.rcParams['figure.autolayout'] = False
+matplotlib.rcParams['path.simplify'] = True
+matplotlib.rcParams['path.simplify_threshold'] = 1.0
+matplotlib.rcParams['agg.path.chunksize'] = 10000
+
+# Simulation time step and horizon (s)
+DT = 0.01
+MAX_TIME = 10
+
+# Reached positions are multiples of 5e-6 m and slider distances of 0.01 m, so exact ties are
+# common; half a quantum of slack keeps rounding error from pushing a tie past the >= test
+POSITION_TOL = 2.5e-6
+
+# Simulations run on a shared uniform time grid and return velocity/position truncated at the
+# collision point; they are cached on their arguments so reruns with repeated slider values skip them
+def _truncate_at_obstacle(velocity, position, distance_to_obstacle):
+    # The start point is never checked for collision, only the positions reached after each step
+    idx = np.searchsorted(position[1:], distance_to_obstacle - POSITION_TOL) + 1
+    collision = bool(idx < len(position))
+    if collision:
+        velocity, position = velocity[:idx + 1], position[:idx + 1]
+    return velocity, position, collision
+
+def _acpe_velocity(time, delay_idx, brake_decel, accel):
+    # Phase 1: sudden acceleration for every step that ends before the brake command.
+    # Phase 2: braking from the peak speed, clamped at standstill.
+    # delay_idx may be a column of indices to get one trajectory per delay in a single pass.
+    t_peak = time[np.clip(delay_idx - 1, 0, len(time) - 1)]
+    return np.where(time <= t_peak, accel * time,
+                    np.maximum(0.0, accel * t_peak + brake_decel * (time - t_peak)))
+
+@st.cache_data(max_entries=512)
+def simulate_with_acpe(time, distance_to_obstacle, delay_s, brake_decel, accel):
+    dt = time[1] - time[0]
+    velocity = _acpe_velocity(time, int(round(delay_s / dt)), brake_decel, accel)
+    position = dt * np.cumsum(velocity, dtype=np.float64)
+    return _truncate_at_obstacle(velocity, position, distance_to_obstacle)
+
+@st.cache_data(max_entries=512)
+def simulate_no_acpe(time, distance_to_obstacle, accel):
+    # Closed form of the step-wise integration: v = a*t, s = dt * sum(v) = 0.5*a*t*(t+dt)
+    dt = time[1] - time[0]
+    velocity = accel * time
+    t = time.astype(np.float64)
+    position = 0.5 * accel * t * (t + dt)
+    return _truncate_at_obstacle(velocity, position, distance_to_obstacle)
+
+@st.cache_data(max_entries=512)
+def stop_distance_by_delay(time, delays_ms, brake_decel, accel):
+    dt = time[1] - time[0]
+    delay_idx = np.rint(np.asarray(delays_ms) / 1000.0 / dt).astype(int)[:, None]
+    velocity = _acpe_velocity(time, delay_idx, brake_decel, accel)
+    position = dt * np.cumsum(velocity, axis=1, dtype=np.float64)
+    # Stop point is the last zero-velocity sample of each trajectory, as in the time-velocity plot
+    stop_idx = len(time) - 1 - np.argmax(velocity[:, ::-1] == 0, axis=1)
+    return position[np.arange(len(delay_idx)), stop_idx]
+
 st.title("ACPE Sudden Acceleration & Braking Simulation")
 
 st.markdown("""
-This simulation models a scenario where the driver of an Ego vehicle accidentally slams the accelerator, causing a sudden acceleration. The ACPE system detects the unintended acceleration and, after a configurable delay, sends a braking command to the chassis. The deceleration is then applied at a fixed rate. You can adjust the following parameters in the sidebar:
+This simulation models a scenario where the driver of an Ego vehicle accidentally slams the accelerator, causing a sudden acceleration. The ACPE system detects the unintended acceleration and, after a configurable delay, sends a braking command to the chassis. The deceleration is then applied at a fixed rate. You can adjust the following parameters in the sidebar and apply them with **Run**:
 
 - **Distance to obstacle** (0–3 m)
 - **ACPE brake command delay** (0–2000 ms)
@@ -22,115 +82,95 @@ This simulation models a scenario where the driver of an Ego vehicle accidentall
 The time-velocity graph below visualizes the scenario, and the final collision speed (if any) is shown.
 """)
 
-# Sidebar parameters
+# Sidebar parameters, grouped in a form so a batch of slider changes triggers a single rerun
 st.sidebar.header("Adjustable Parameters")
-distance_to_obstacle = st.sidebar.slider("Distance to obstacle (m)", 0.0, 3.0, 2.0, 0.01)
-delay_ms = st.sidebar.slider("ACPE brake command delay (ms)", 0, 2000, 600, 10)
-brake_decel = st.sidebar.slider("Braking deceleration (m/s², negative)", -20.0, 0.0, -8.0, 0.1)
-accel = st.sidebar.slider("Sudden acceleration (m/s²)", 0.0, 10.0, 3.0, 0.1)
+with st.sidebar.form("params"):
+    distance_to_obstacle = st.slider("Distance to obstacle (m)", 0.0, 3.0, 2.0, 0.01)
+    delay_ms = st.slider("ACPE brake command delay (ms)", 0, 2000, 600, 10)
+    brake_decel = st.slider("Braking deceleration (m/s², negative)", -20.0, 0.0, -8.0, 0.1)
+    accel = st.slider("Sudden acceleration (m/s²)", 0.0, 10.0, 3.0, 0.1)
+    st.form_submit_button("Run")
 
 delay_s = delay_ms / 1000.0
 
-def simulate_with_acpe(distance_to_obstacle, delay_s, brake_decel, accel, dt=0.01, max_time=10):
-    time = [0]
-    velocity = [0]
-    position = [0]
-    collision = False
-    while time[-1] < max_time and not collision:
-        t = time[-1] + dt
-        if t < delay_s:
-            a = accel
-        else:
-            a = brake_decel if velocity[-1] > 0 else 0
-        v = max(0, velocity[-1] + a * dt)
-        s = position[-1] + v * dt
-        time.append(t)
-        velocity.append(v)
-        position.append(s)
-        if s >= distance_to_obstacle:
-            collision = True
-            break
-    return np.array(time), np.array(velocity), np.array(position), collision
-
-def simulate_no_acpe(distance_to_obstacle, accel, dt=0.01, max_time=10):
-    time = [0]
-    velocity = [0]
-    position = [0]
-    collision = False
-    while time[-1] < max_time and not collision:
-        t = time[-1] + dt
-        a = accel
-        v = max(0, velocity[-1] + a * dt)
-        s = position[-1] + v * dt
-        time.append(t)
-        velocity.append(v)
-        position.append(s)
-        if s >= distance_to_obstacle:
-            collision = True
-            break
-    return np.array(time), np.array(velocity), np.array(position), collision
-
-# Run both simulations
-time, velocity, position, collision = simulate_with_acpe(distance_to_obstacle, delay_s, brake_decel, accel)
-time_noacpe, velocity_noacpe, position_noacpe, collision_noacpe = simulate_no_acpe(distance_to_obstacle, accel)
-
-# Convert all velocities to KPH for display and plotting
-velocity_kph = velocity * 3.6
-velocity_noacpe_kph = velocity_noacpe * 3.6
-
-# Prepare plot
-fig, ax1 = plt.subplots(figsize=(8, 4))
-ax1.plot(time, velocity_kph, label="Velocity with ACPE (KPH)", color="b")
-ax1.plot(time_noacpe, velocity_noacpe_kph, label="Velocity without ACPE (KPH)", color="orange", linestyle="--")
-ax1.set_xlabel("Time (s)")
-ax1.set_ylabel("Velocity (KPH)", color="b")
-ax1.tick_params(axis='y', labelcolor='b')
-ax1.grid(True)
-
-# Always show 8 KPH horizontal line
-ax1.axhline(8, color='purple', linestyle=':', label='8 KPH Reference')
+# Run both simulations on one shared time grid; velocities are float32, positions stay float64
+time_grid = np.linspace(0.0, MAX_TIME, int(round(MAX_TIME / DT)) + 1, dtype=np.float32)
+velocity, position, collision = simulate_with_acpe(time_grid, distance_to_obstacle, delay_s, brake_decel, accel)
+velocity_noacpe, position_noacpe, collision_noacpe = simulate_no_acpe(time_grid, distance_to_obstacle, accel)
+time = time_grid[:len(velocity)]
+time_noacpe = time_grid[:len(velocity_noacpe)]
+
+# Build the time-velocity figure once per session; reruns only update its data and markers
+def _make_velocity_figure():
+    fig, ax1 = plt.subplots(figsize=(8, 4))
+    line_acpe, = ax1.plot([], [], label="Velocity with ACPE (KPH)", color="b")
+    line_noacpe, = ax1.plot([], [], label="Velocity without ACPE (KPH)", color="orange", linestyle="--")
+    ax1.set_xlabel("Time (s)")
+    ax1.set_ylabel("Velocity (KPH)", color="b")
+    ax1.tick_params(axis='y', labelcolor='b')
+    ax1.grid(True)
+
+    # Always show 8 KPH horizontal line
+    ax1.axhline(8, color='purple', linestyle=':', label='8 KPH Reference')
+    return fig, ax1, line_acpe, line_noacpe, []
+
+if "velocity_figure" not in st.session_state:
+    st.session_state.velocity_figure = _make_velocity_figure()
+fig, ax1, line_acpe, line_noacpe, markers = st.session_state.velocity_figure
+
+# Drop the collision/braking markers of the previous rerun
+for artist in markers:
+    artist.remove()
+markers.clear()
+
+# Velocities are converted to KPH for display and plotting
+line_acpe.set_data(time, velocity * 3.6)
+line_noacpe.set_data(time_noacpe, velocity_noacpe * 3.6)
 
 # Mark collision points and annotate collision speeds
 if collision:
-    collision_time = time[position >= distance_to_obstacle][0]
-    collision_speed_kph = velocity_kph[position >= distance_to_obstacle][0]
-    ax1.axvline(collision_time, color='r', linestyle='--', label='Collision (ACPE)')
-    ax1.plot(collision_time, collision_speed_kph, 'ro')
-    ax1.annotate(f"ACPE\n{collision_speed_kph:.2f} KPH",
-                 xy=(collision_time, collision_speed_kph),
-                 xytext=(collision_time, collision_speed_kph + 2),
-                 arrowprops=dict(facecolor='red', shrink=0.05),
-                 fontsize=10, color='red', bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.7))
+    collision_idx = np.searchsorted(position, distance_to_obstacle - POSITION_TOL)
+    collision_time = time[collision_idx]
+    collision_speed_kph = velocity[collision_idx] * 3.6
+    markers.append(ax1.axvline(collision_time, color='r', linestyle='--', label='Collision (ACPE)'))
+    markers.extend(ax1.plot(collision_time, collision_speed_kph, 'ro'))
+    markers.append(ax1.annotate(f"ACPE\n{collision_speed_kph:.2f} KPH",
+                                xy=(collision_time, collision_speed_kph),
+                                xytext=(collision_time, collision_speed_kph + 2),
+                                arrowprops=dict(facecolor='red', shrink=0.05),
+                                fontsize=10, color='red', bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.7)))
 else:
     collision_speed_kph = 0
     st.success("No collision within simulation time (ACPE enabled).")
 
 if collision_noacpe:
-    collision_time_noacpe = time_noacpe[position_noacpe >= distance_to_obstacle][0]
-    collision_speed_noacpe_kph = velocity_noacpe_kph[position_noacpe >= distance_to_obstacle][0]
-    ax1.axvline(collision_time_noacpe, color='brown', linestyle='--', label='Collision (No ACPE)')
-    ax1.plot(collision_time_noacpe, collision_speed_noacpe_kph, 'o', color='brown')
-    ax1.annotate(f"No ACPE\n{collision_speed_noacpe_kph:.2f} KPH",
-                 xy=(collision_time_noacpe, collision_speed_noacpe_kph),
-                 xytext=(collision_time_noacpe, collision_speed_noacpe_kph + 2),
-                 arrowprops=dict(facecolor='brown', shrink=0.05),
-                 fontsize=10, color='brown', bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.7))
+    collision_idx_noacpe = np.searchsorted(position_noacpe, distance_to_obstacle - POSITION_TOL)
+    collision_time_noacpe = time_noacpe[collision_idx_noacpe]
+    collision_speed_noacpe_kph = velocity_noacpe[collision_idx_noacpe] * 3.6
+    markers.append(ax1.axvline(collision_time_noacpe, color='brown', linestyle='--', label='Collision (No ACPE)'))
+    markers.extend(ax1.plot(collision_time_noacpe, collision_speed_noacpe_kph, 'o', color='brown'))
+    markers.append(ax1.annotate(f"No ACPE\n{collision_speed_noacpe_kph:.2f} KPH",
+                                xy=(collision_time_noacpe, collision_speed_noacpe_kph),
+                                xytext=(collision_time_noacpe, collision_speed_noacpe_kph + 2),
+                                arrowprops=dict(facecolor='brown', shrink=0.05),
+                                fontsize=10, color='brown', bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.7)))
 else:
     collision_speed_noacpe_kph = 0
     st.success("No collision within simulation time (No ACPE).")
 
 # Show Chassis Braking Start (should align with velocity turning point) only if ACPE avoids collision
 if not collision:
-    turning_idx = np.argmax(time >= delay_s)
+    # Uniform time grid: the first step at or after the brake command
+    turning_idx = int(round(delay_s / DT))
     turning_time = time[turning_idx]
-    turning_velocity_kph = velocity_kph[turning_idx]
+    turning_velocity_kph = velocity[turning_idx] * 3.6
     turning_position = position[turning_idx]
-    ax1.axvline(turning_time, color='g', linestyle=':', label='Chassis Physical Braking Start')
-    ax1.annotate(f"Chassis Braking Start\nDistance: {turning_position:.2f} m",
-                 xy=(turning_time, turning_velocity_kph),
-                 xytext=(turning_time, turning_velocity_kph + 2),
-                 arrowprops=dict(facecolor='green', shrink=0.05),
-                 fontsize=10, color='green', bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.7))
+    markers.append(ax1.axvline(turning_time, color='g', linestyle=':', label='Chassis Physical Braking Start'))
+    markers.append(ax1.annotate(f"Chassis Braking Start\nDistance: {turning_position:.2f} m",
+                                xy=(turning_time, turning_velocity_kph),
+                                xytext=(turning_time, turning_velocity_kph + 2),
+                                arrowprops=dict(facecolor='green', shrink=0.05),
+                                fontsize=10, color='green', bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.7)))
 
     # Find all indices where velocity is zero
     zero_vel_indices = np.where(velocity == 0)[0]
@@ -138,17 +178,19 @@ if not collision:
         stop_idx = zero_vel_indices[-1]
         stop_distance = position[stop_idx]
         stop_time = time[stop_idx]
-        stop_velocity_kph = velocity_kph[stop_idx]
-        ax1.plot(stop_time, stop_velocity_kph, 'go')
-        ax1.annotate(f"Stop\nDistance: {stop_distance:.2f} m",
-                     xy=(stop_time, stop_velocity_kph),
-                     xytext=(stop_time, stop_velocity_kph + 2),
-                     arrowprops=dict(facecolor='green', shrink=0.05),
-                     fontsize=10, color='green', bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.7))
+        stop_velocity_kph = velocity[stop_idx] * 3.6
+        markers.extend(ax1.plot(stop_time, stop_velocity_kph, 'go'))
+        markers.append(ax1.annotate(f"Stop\nDistance: {stop_distance:.2f} m",
+                                    xy=(stop_time, stop_velocity_kph),
+                                    xytext=(stop_time, stop_velocity_kph + 2),
+                                    arrowprops=dict(facecolor='green', shrink=0.05),
+                                    fontsize=10, color='green', bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.7)))
         st.markdown(f"**Distance traveled when vehicle comes to a complete stop after ACPE intervention: {stop_distance:.2f} m**")
     else:
         st.markdown("**No stop point detected.**")
 
+ax1.relim()
+ax1.autoscale_view()
 ax1.legend(loc='center left', bbox_to_anchor=(1, 0.5))
 st.pyplot(fig)
 
@@ -178,17 +220,7 @@ st.markdown(f"- Sudden acceleration: {accel} m/s²")
 
 # Generate stop distance data for different delays
 delay_range_ms = np.arange(0, 2001, 100)
-stop_distances = []
-for delay in delay_range_ms:
-    delay_s_temp = delay / 1000.0
-    time_temp, velocity_temp, position_temp, collision_temp = simulate_with_acpe(distance_to_obstacle=9999, delay_s=delay_s_temp, brake_decel=brake_decel, accel=accel)
-    zero_vel_indices = np.where(velocity_temp == 0)[0]
-    if len(zero_vel_indices) > 0:
-        stop_idx = zero_vel_indices[-1]
-        stop_distance = position_temp[stop_idx]
-        stop_distances.append(stop_distance)
-    else:
-        stop_distances.append(np.nan)
+stop_distances = stop_distance_by_delay(time_grid, delay_range_ms, brake_decel, accel)
 
 fig2, ax2 = plt.subplots(figsize=(7, 4))
 ax2.plot(delay_range_ms, stop_distances, marker='o', color='teal')